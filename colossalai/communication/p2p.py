@@ -1,42 +1,150 @@
 #!/usr/bin/env python
 # -*- encoding: utf-8 -*-
 
-from typing import List, Tuple, Union
+import os
+from collections import defaultdict
+from typing import Dict, List, Tuple, Union
 import torch
 import torch.distributed as dist
 
 from colossalai.context.parallel_mode import ParallelMode
 from colossalai.core import global_context as gpc
 from colossalai.utils import get_current_device
-from functools import reduce
+from functools import lru_cache, reduce
 import operator
 from .utils import split_tensor_into_1d_equal_chunks, gather_split_1d_tensor
 
 
 TensorShape = Union[torch.Size, List[int], Tuple[int]]
 
+# set COLOSSAL_P2P_FULL_SYNC=1 to restore the device-wide synchronization after each
+# batch_isend_irecv, which works around the race condition of older NCCL/PyTorch versions
+_P2P_FULL_SYNC = os.environ.get('COLOSSAL_P2P_FULL_SYNC', '0') not in ('', '0')
+
+# free buffers for receiving activations, keyed by (shape, dtype, device)
+_RECV_BUF_POOL: Dict[Tuple, List[torch.Tensor]] = defaultdict(list)
+
+# dedicated stream for p2p communication, created lazily by _get_p2p_stream
+_P2P_STREAM = None
+
+
+@lru_cache(maxsize=16)
+def _get_chunk_shape(tensor_shape: Tuple[int], tensor_parallel_world_size: int) -> Tuple[TensorShape, bool]:
+    # only a handful of shapes are communicated in a training run, so the results are cached
+    tensor_numel = reduce(operator.mul, tensor_shape, 1)
+    if tensor_numel % tensor_parallel_world_size == 0:
+        return tensor_numel // tensor_parallel_world_size, True
+    return tensor_shape, False
+
 
 def _get_tensor_shape(tensor_shape: TensorShape, chunk_tensor: bool = False) -> Tuple[TensorShape, bool]:
     """get the exact tensor shape when communicating and return whether the tensor is a chunk
 
     :param tensor_shape: shape of tensor
     :type tensor_shape: TensorShape
-    :param chunk_tensor: whether to chunk tensor, defaults to False
+    :param chunk_tensor: whether to chunk tensor, defaults to False.
+        The tensor is chunked over the 1D tensor parallel group, so its numel must be divisible by the group size,
+        otherwise it is sent as a whole
     :type chunk_tensor: bool, optional
     :return: exact tensor shape, whether to chunk tensor
     :rtype: Tuple[Union[torch.Size, List[int], Tuple[int]], bool]
     """
-    if chunk_tensor:
-        tensor_chunk_shape = reduce(operator.mul, tensor_shape, 1)
-        tensor_parallel_world_size = gpc.get_world_size(ParallelMode.TENSOR)
-        if tensor_chunk_shape % tensor_parallel_world_size == 0:
-            tensor_chunk_shape = tensor_chunk_shape // tensor_parallel_world_size
-        else:
-            tensor_chunk_shape = tensor_shape
-            chunk_tensor = False
-    else:
-        tensor_chunk_shape = tensor_shape
-    return tensor_chunk_shape, chunk_tensor
+    if not chunk_tensor:
+        return tensor_shape, False
+    # must be consistent with the group used by split_tensor_into_1d_equal_chunks and gather_split_1d_tensor
+    return _get_chunk_shape(tuple(tensor_shape), gpc.get_world_size(ParallelMode.PARALLEL_1D))
+
+
+def _acquire_recv_buf(shape: TensorShape, dtype: torch.dtype, device) -> torch.Tensor:
+    """Get a tensor to receive activations into. The buffer is taken from the pool if possible
+    and is given back to the pool once the gradient of the returned tensor has been computed,
+    as its data is no longer needed by then.
+
+    Note that the buffer is reused by the next receive of the same shape after that,
+    so views of the returned tensor (e.g. the output of a last stage which reshapes its input)
+    must not be kept beyond the backward pass of the micro batch.
+    The pool is freed when the parallel context is destroyed.
+
+    :param shape: shape of the tensor
+    :type shape: TensorShape
+    :param dtype: data type of the tensor
+    :type dtype: torch.dtype
+    :param device: device of the tensor
+    :return: a leaf tensor which requires grad
+    :rtype: :class:`torch.Tensor`
+    """
+    pool = _RECV_BUF_POOL[(tuple(shape), dtype, device)]
+    buf = pool.pop() if len(pool) > 0 else torch.empty(shape, device=device, dtype=dtype)
+    tensor = buf.detach().requires_grad_()
+    released = False
+
+    def _release_buf(grad):
+        nonlocal released
+        if not released:
+            released = True
+            pool.append(buf)
+
+    tensor.register_hook(_release_buf)
+    return tensor
+
+
+@lru_cache(maxsize=None)
+def _cached_pp_neighbors() -> Tuple[int, int]:
+    """Get the global ranks of the previous and the next pipeline stages.
+    They are constant during training, so they are looked up only once; the cache
+    is cleared when the parallel context is destroyed.
+
+    :return: (prev_rank, next_rank)
+    :rtype: Tuple[int, int]
+    """
+    return gpc.get_prev_global_rank(ParallelMode.PIPELINE), gpc.get_next_global_rank(ParallelMode.PIPELINE)
+
+
+def reset_p2p_cache():
+    """Clear the states of p2p communication which depend on the process groups.
+    It is called when the parallel context is destroyed.
+    """
+    _cached_pp_neighbors.cache_clear()
+    _RECV_BUF_POOL.clear()
+
+
+gpc.register_destroy_hook(reset_p2p_cache)
+
+
+def _get_p2p_stream() -> torch.cuda.Stream:
+    """Get the stream for pipeline p2p communication, which is created on the first call.
+    """
+    global _P2P_STREAM
+    if _P2P_STREAM is None:
+        _P2P_STREAM = torch.cuda.Stream()
+    return _P2P_STREAM
+
+
+def _batch_communicate(ops: List[dist.P2POp]):
+    """Launch all the p2p operations of a pipeline step as a single batch, so that
+    adjacent pipeline ranks enter NCCL at the same time, and wait for them to finish.
+
+    The operations run on a dedicated stream, and the current stream waits for them to finish,
+    so received tensors are ready for their consumers on the current stream.
+
+    :param ops: p2p operations to be launched together
+    :type ops: List[:class:`torch.distributed.P2POp`]
+    """
+    if len(ops) > 0:
+        stream = _get_p2p_stream()
+        # tensors to send are produced on the current stream
+        stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(stream):
+            if len(ops) == 1:
+                # a single operation does not need the coalescing of batch_isend_irecv
+                reqs = [ops[0].op(ops[0].tensor, ops[0].peer, ops[0].group)]
+            else:
+                reqs = dist.batch_isend_irecv(ops)
+            for req in reqs:
+                req.wait()
+        for op in ops:
+            op.tensor.record_stream(stream)
+        torch.cuda.current_stream().wait_stream(stream)
 
 
 def _communicate(tensor_send_next=None,
@@ -71,38 +179,53 @@ def _communicate(tensor_send_next=None,
     tensor_recv_prev = None
     tensor_recv_next = None
 
+    # shapes of the sent and received tensors usually coincide, so each one is only resolved once
+    shape_cache: Dict[Tuple[int], Tuple[TensorShape, bool]] = dict()
+
+    def get_tensor_shape(tensor_shape):
+        key = tuple(tensor_shape)
+        if key not in shape_cache:
+            shape_cache[key] = _get_tensor_shape(tensor_shape, scatter_gather_tensors)
+        return shape_cache[key]
+
+    # received tensors are only leaves of autograd when gradients will be computed
+    requires_grad = torch.is_grad_enabled()
+
     if recv_prev:
         assert recv_prev_shape is not None
-        recv_prev_chunk_shape, recv_prev_split = _get_tensor_shape(recv_prev_shape, scatter_gather_tensors)
-        tensor_recv_prev = torch.empty(recv_prev_chunk_shape,
-                                       requires_grad=True,
-                                       device=get_current_device(),
-                                       dtype=dtype)
+        recv_prev_chunk_shape, recv_prev_split = get_tensor_shape(recv_prev_shape)
+        if recv_prev_split or not requires_grad:
+            # the gathered tensor is a new tensor, and a buffer without gradient can never be
+            # known to be free, so the buffer is not pooled in both cases
+            tensor_recv_prev = torch.empty(recv_prev_chunk_shape,
+                                           requires_grad=requires_grad and not recv_prev_split,
+                                           device=get_current_device(),
+                                           dtype=dtype)
+        else:
+            tensor_recv_prev = _acquire_recv_buf(recv_prev_chunk_shape, dtype, get_current_device())
     if recv_next:
         assert recv_next_shape is not None
-        recv_next_chunk_shape, recv_next_split = _get_tensor_shape(recv_next_shape, scatter_gather_tensors)
+        recv_next_chunk_shape, recv_next_split = get_tensor_shape(recv_next_shape)
         tensor_recv_next = torch.empty(recv_next_chunk_shape,
-                                       requires_grad=True,
+                                       requires_grad=requires_grad and not recv_next_split,
                                        device=get_current_device(),
                                        dtype=dtype)
 
     if tensor_send_prev is not None or recv_prev:
         if prev_rank is None:
-            prev_rank = gpc.get_prev_global_rank(
-                ParallelMode.PIPELINE)
+            prev_rank = _cached_pp_neighbors()[0]
 
     if tensor_send_next is not None or recv_next:
         if next_rank is None:
-            next_rank = gpc.get_next_global_rank(
-                ParallelMode.PIPELINE)
+            next_rank = _cached_pp_neighbors()[1]
 
     if tensor_send_prev is not None:
-        send_prev_split = _get_tensor_shape(tensor_send_prev.shape, scatter_gather_tensors)[1]
+        send_prev_split = get_tensor_shape(tensor_send_prev.shape)[1]
         if send_prev_split:
             tensor_send_prev = split_tensor_into_1d_equal_chunks(tensor_send_prev)
 
     if tensor_send_next is not None:
-        send_next_split = _get_tensor_shape(tensor_send_next.shape, scatter_gather_tensors)[1]
+        send_next_split = get_tensor_shape(tensor_send_next.shape)[1]
         if send_next_split:
             tensor_send_next = split_tensor_into_1d_equal_chunks(tensor_send_next)
 
@@ -119,17 +242,15 @@ def _communicate(tensor_send_next=None,
     if tensor_send_next is not None:
         send_next_op = dist.P2POp(dist.isend, tensor_send_next, next_rank)
         ops.append(send_next_op)
-    if len(ops) > 0:
-        reqs = dist.batch_isend_irecv(ops)
-        for req in reqs:
-            req.wait()
-    # To protect against race condition when using batch_isend_irecv().
-    torch.cuda.synchronize()
+    _batch_communicate(ops)
+    if _P2P_FULL_SYNC:
+        # To protect against race condition when using batch_isend_irecv().
+        torch.cuda.synchronize()
 
     if recv_prev and recv_prev_split:
-        tensor_recv_prev = gather_split_1d_tensor(tensor_recv_prev).view(recv_prev_shape).requires_grad_()
+        tensor_recv_prev = gather_split_1d_tensor(tensor_recv_prev).view(recv_prev_shape).requires_grad_(requires_grad)
     if recv_next and recv_next_split:
-        tensor_recv_next = gather_split_1d_tensor(tensor_recv_next).view(recv_next_shape).requires_grad_()
+        tensor_recv_next = gather_split_1d_tensor(tensor_recv_next).view(recv_next_shape).requires_grad_(requires_grad)
     return tensor_recv_prev, tensor_recv_next
 
 
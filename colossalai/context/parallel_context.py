@@ -2,7 +2,7 @@
 # -*- encoding: utf-8 -*-
 
 import random
-from typing import Union
+from typing import Callable, Union
 
 import numpy as np
 import torch
@@ -43,6 +43,9 @@ class ParallelContext(metaclass=SingletonMeta):
         self.virtual_pipeline_parallel_size = None
         self.virtual_pipeline_parallel_rank = None
 
+        # functions to clear states depending on the process groups, called when the context is destroyed
+        self._destroy_hooks = []
+
         # logging
         self._verbose = False
         self._logger = get_dist_logger()
@@ -419,6 +422,16 @@ class ParallelContext(metaclass=SingletonMeta):
         """
         return parallel_mode in self._groups
 
+    def register_destroy_hook(self, hook: Callable[[], None]):
+        """Registers a function to be called when the parallel context is destroyed,
+        which is used by other modules to clear their states depending on the process groups, e.g. caches.
+
+        :param hook: A function without arguments
+        :type hook: Callable[[], None]
+        """
+        if hook not in self._destroy_hooks:
+            self._destroy_hooks.append(hook)
+
     def destroy(self):
         """Destroys the current distributed parallel environment.
         """
@@ -429,6 +442,9 @@ class ParallelContext(metaclass=SingletonMeta):
         dist.destroy_process_group()
         self._groups.clear()
 
+        for hook in self._destroy_hooks:
+            hook()
+
     def set_device(self, device_ordinal: int = None):
         """Sets distributed processes to be bound to devices.
 
@@ -47,7 +47,10 @@ class PipelineSchedule(BaseSchedule):
     :type batch_data_process_func: Callable, optional
     :param tensor_shape: Specified shape in pipeline communication
     :type tensor_shape: torch.Size, optional
-    :param scatter_gather_tensors: If set to `True`, communication will be reduced over pipeline when using 1D tensor parallelization
+    :param scatter_gather_tensors: If set to `True`, communication will be reduced over pipeline when using 1D tensor
+        parallelization. Each tensor parallel rank only sends its chunk of the tensor and the chunks are all-gathered
+        within the tensor parallel group after receiving, so the tensors passed between stages must be identical across
+        the tensor parallel group. It must be set to the same value on all ranks
     :type scatter_gather_tensors: bool, optional
     """
 
@@ -288,12 +291,18 @@ class PipelineSchedule(BaseSchedule):
                                               return_output_label=return_output_label,
                                               accum_loss=accum_loss)
             if forward_only:
-                comm.send_forward(output_tensor, scatter_gather_tensors=self.scatter_gather_tensors)
-
-                if not last_iteration:
-                    input_tensor = comm.recv_forward(ft_shape,
-                                                     dtype=self.dtype,
-                                                     scatter_gather_tensors=self.scatter_gather_tensors)
+                if last_iteration:
+                    comm.send_forward(output_tensor, scatter_gather_tensors=self.scatter_gather_tensors)
+                else:
+                    # fuse the send and the recv so that adjacent stages launch NCCL together
+                    if gpc.is_pipeline_last_stage():
+                        output_tensor = None
+                    input_tensor = comm.send_forward_recv_forward(
+                        output_tensor,
+                        ft_shape,
+                        recv_prev=not gpc.is_pipeline_first_stage(),
+                        dtype=self.dtype,
+                        scatter_gather_tensors=self.scatter_gather_tensors)
 
             else:
                 output_tensor_grad = comm.send_forward_recv_backward(output_tensor,
@@ -27,6 +27,7 @@ SOFTWARE
 #include <memory>
 #include <type_traits>
 #include <unordered_map>
+#include <vector>
 #include <string.h>
 
 
@@ -501,7 +502,48 @@ int adam_step(int optimizer_id,
     return 0;
 }
 
+int multi_tensor_adam_step(int optimizer_id,
+                           size_t step,
+                           float lr,
+                           float beta1,
+                           float beta2,
+                           float epsilon,
+                           float weight_decay,
+                           bool bias_correction,
+                           const std::vector<torch::Tensor>& params,
+                           const std::vector<torch::Tensor>& grads,
+                           const std::vector<torch::Tensor>& exp_avg,
+                           const std::vector<torch::Tensor>& exp_avg_sq,
+                           float loss_scale)
+{
+    TORCH_CHECK(params.size() == grads.size() && params.size() == exp_avg.size() &&
+                    params.size() == exp_avg_sq.size(),
+                "The numbers of params, grads, exp_avg and exp_avg_sq should be the same");
+
+    std::shared_ptr<Adam_Optimizer> opt =
+        std::static_pointer_cast<Adam_Optimizer>(s_optimizers[optimizer_id]);
+    // all the tensors share the same step, so the optimizer state is only updated once
+    opt->IncrementStep(step, beta1, beta2);
+    opt->update_state(lr, epsilon, weight_decay, bias_correction);
+
+    for (size_t i = 0; i < params.size(); i++) {
+        auto params_c = params[i].contiguous();
+        auto grads_c = grads[i].contiguous();
+        auto exp_avg_c = exp_avg[i].contiguous();
+        auto exp_avg_sq_c = exp_avg_sq[i].contiguous();
+
+        opt->Step_8((float*)params_c.data_ptr(),
+                    (float*)grads_c.data_ptr(),
+                    (float*)exp_avg_c.data_ptr(),
+                    (float*)exp_avg_sq_c.data_ptr(),
+                    params_c.numel(),
+                    (params[i].options().dtype() == at::kHalf),
+                    (grads[i].options().dtype() == at::kHalf),
+                    loss_scale);
+    }
 
+    return 0;
+}
 
 int destroy_adam_optimizer(int optimizer_id)
 {
@@ -512,6 +554,7 @@ int destroy_adam_optimizer(int optimizer_id)
 PYBIND11_MODULE(TORCH_EXTENSION_NAME, m)
 {
     m.def("adam_update", &adam_step, "CPU Adam update (C++)");
+    m.def("multi_tensor_adam_update", &multi_tensor_adam_step, "CPU Adam update of a list of tensors (C++)");
     m.def("create_adam", &create_adam_optimizer, "CPU Adam (C++)");
     m.def("destroy_adam", &destroy_adam_optimizer, "CPU Adam destroy (C++)");
 }
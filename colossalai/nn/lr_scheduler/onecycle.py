@@ -79,7 +79,7 @@ class OneCycleLR(_OneCycleLR):
                  div_factor=25.0,
                  final_div_factor=10000.0,
                  last_epoch=-1, **kwargs):
-        max_lrs = list(map(lambda group: group['lr'], optimizer.param_groups))
+        max_lrs = [group['lr'] for group in optimizer.param_groups]
         super().__init__(optimizer, max_lrs, total_steps=total_steps,
                          pct_start=pct_start,
                          anneal_strategy=anneal_strategy,
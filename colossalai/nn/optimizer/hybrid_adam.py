@@ -6,6 +6,8 @@ class HybridAdam(torch.optim.Optimizer):
     # Number of fp32 shards for per parameter
     # Param weight, grad, momentum and variance
     num_fp32_shards_per_param = 4
+    # the fused adam kernel never sets the overflow flag, so a flag is shared by all instances on the same device
+    _DUMMY_OVERFLOW_BUFS = dict()
 
     def __init__(self,
                  model_params,
@@ -15,11 +17,15 @@ class HybridAdam(torch.optim.Optimizer):
                  eps=1e-8,
                  weight_decay=0,
                  adamw_mode=True,
-                 simd_log=False):
+                 simd_log=False,
+                 pin_cpu_state=True):
         """
         An implementation equivalent to `torch.optim.Adam`.
         The difference is that model_params are sharded parameters belonging to a ShardedModelV2 instance.
         The sharded param of model_params can resident on both CPU and CUDA(fused adam).
+        If `pin_cpu_state` is True, the optimizer states of CPU-resident params are kept in pinned memory.
+        `step()` synchronizes the current CUDA stream once before updating CPU-resident params,
+        so their gradients may be moved to CPU by `grad.to('cpu', non_blocking=True)` on the current stream.
         """
 
         default_args = dict(lr=lr, betas=betas, eps=eps, weight_decay=weight_decay, bias_correction=bias_correction)
@@ -27,6 +33,7 @@ class HybridAdam(torch.optim.Optimizer):
         self.opt_id = HybridAdam.optimizer_id
         HybridAdam.optimizer_id = HybridAdam.optimizer_id + 1
         self.adamw_mode = adamw_mode
+        self.pin_cpu_state = pin_cpu_state and torch.cuda.is_available()
         try:
             import cpu_adam
             import colossal_C
@@ -37,7 +44,13 @@ class HybridAdam(torch.optim.Optimizer):
         self.cpu_adam_op.create_adam(self.opt_id, lr, betas[0], betas[1], eps, weight_decay, adamw_mode, simd_log)
 
         self.gpu_adam_op = colossal_C.multi_tensor_adam
-        self._dummy_overflow_buf = torch.cuda.IntTensor([0])
+
+    @classmethod
+    def _get_dummy_overflow_buf(cls, device: torch.device) -> torch.Tensor:
+        # created on first use on the device of the params, which is known only when they are updated
+        if device not in cls._DUMMY_OVERFLOW_BUFS:
+            cls._DUMMY_OVERFLOW_BUFS[device] = torch.zeros(1, dtype=torch.int32, device=device)
+        return cls._DUMMY_OVERFLOW_BUFS[device]
 
     def __del__(self):
         if self.cpu_adam_op:
@@ -50,10 +63,21 @@ class HybridAdam(torch.optim.Optimizer):
             with torch.enable_grad():
                 loss = closure()
 
-        for _, group in enumerate(self.param_groups):
-            g_l, p_l, m_l, v_l = [], [], [], []
-            group_step = 0
-            for _, p in enumerate(group['params']):
+        adamw_mode = 1 if self.adamw_mode else 0
+        # cpu adam reads grads on the host, so pending D2H copies of grads must land first
+        cuda_synchronized = not torch.cuda.is_available()
+        # params sharing the same hyper-parameters and step are updated by one fused adam kernel launch
+        gpu_buckets = dict()
+        for group in self.param_groups:
+            # params of a group can have different steps, e.g. when their grads were None on some steps,
+            # so cpu params are bucketed by step to get their own bias correction
+            cpu_buckets = dict()
+            lr = group['lr']
+            beta1, beta2 = group['betas']
+            eps = group['eps']
+            weight_decay = group['weight_decay']
+            bias_correction = 1 if group['bias_correction'] else 0
+            for p in group['params']:
 
                 if p.grad is None:
                     continue
@@ -63,39 +87,61 @@ class HybridAdam(torch.optim.Optimizer):
                 target_device = p.device
                 if len(state) == 0:
                     state['step'] = 0
+                    pin_memory = self.pin_cpu_state and target_device.type == 'cpu'
 
                     # gradient momentums
-                    state['exp_avg'] = torch.zeros_like(p.data, dtype=torch.float, device=target_device)
+                    state['exp_avg'] = torch.zeros(p.data.shape,
+                                                   dtype=torch.float32,
+                                                   device=target_device,
+                                                   pin_memory=pin_memory)
                     # gradient variances
-                    state['exp_avg_sq'] = torch.zeros_like(p.data, dtype=torch.float, device=target_device)
+                    state['exp_avg_sq'] = torch.zeros(p.data.shape,
+                                                      dtype=torch.float32,
+                                                      device=target_device,
+                                                      pin_memory=pin_memory)
 
                 state['step'] += 1
-                group_step = state['step']
-                beta1, beta2 = group['betas']
 
                 if target_device.type == 'cpu':
                     assert state['exp_avg'].device.type == 'cpu', "exp_avg should stay on cpu"
                     assert state['exp_avg_sq'].device.type == 'cpu', "exp_avg should stay on cpu"
-                    self.cpu_adam_op.adam_update(self.opt_id, state['step'], group['lr'], beta1, beta2, group['eps'],
-                                                 group['weight_decay'], group['bias_correction'], p.data, p.grad.data,
-                                                 state['exp_avg'], state['exp_avg_sq'], -1)
+
+                    # record the state by step and update at once
+                    if state['step'] not in cpu_buckets:
+                        cpu_buckets[state['step']] = ([], [], [], [])
+                    bucket = cpu_buckets[state['step']]
+                    bucket[0].append(p.data)
+                    bucket[1].append(p.grad.data)
 
                 elif target_device.type == 'cuda':
                     assert state['exp_avg'].device.type == 'cuda', "exp_avg should stay on cuda"
                     assert state['exp_avg_sq'].device.type == 'cuda', "exp_avg should stay on cuda"
 
-                    # record the state by gruop and update at once
-                    g_l.append(p.grad.data)
-                    p_l.append(p.data)
-                    m_l.append(state['exp_avg'])
-                    v_l.append(state['exp_avg_sq']) 
+                    # record the state by hyper-parameters and step and update at once
+                    # the kernel dispatches on the dtypes of the first grad and param, and runs on a single device
+                    bucket_key = (lr, beta1, beta2, eps, state['step'], bias_correction, weight_decay, p.grad.dtype,
+                                  p.dtype, target_device)
+                    if bucket_key not in gpu_buckets:
+                        gpu_buckets[bucket_key] = ([], [], [], [])
+                    bucket = gpu_buckets[bucket_key]
+                    bucket[0].append(p.grad.data)
+                    bucket[1].append(p.data)
 
                 else:
                     raise RuntimeError
-            if len(g_l) > 0:
-                adamw_mode = 1 if self.adamw_mode else 0
-                bias_correction = 1 if group['bias_correction'] else 0
-                multi_tensor_applier(self.gpu_adam_op, self._dummy_overflow_buf, [g_l, p_l,m_l, v_l],
-                                     group['lr'], group['betas'][0], group['betas'][1], group['eps'], group_step,
-                                     adamw_mode, bias_correction, group['weight_decay'])
+                bucket[2].append(state['exp_avg'])
+                bucket[3].append(state['exp_avg_sq'])
+
+            if len(cpu_buckets) > 0 and not cuda_synchronized:
+                torch.cuda.current_stream().synchronize()
+                cuda_synchronized = True
+            for step, (p_l, g_l, m_l, v_l) in cpu_buckets.items():
+                self.cpu_adam_op.multi_tensor_adam_update(self.opt_id, step, lr, beta1, beta2, eps, weight_decay,
+                                                          bias_correction, p_l, g_l, m_l, v_l, -1)
+
+        for bucket_key, tensor_lists in gpu_buckets.items():
+            lr, beta1, beta2, eps, step, bias_correction, weight_decay, _, _, device = bucket_key
+            dummy_overflow_buf = self._get_dummy_overflow_buf(device)
+            multi_tensor_applier(self.gpu_adam_op, dummy_overflow_buf, list(tensor_lists), lr, beta1, beta2, eps, step,
+                                 adamw_mode, bias_correction, weight_decay)
         return loss
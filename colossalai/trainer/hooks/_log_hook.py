@@ -238,7 +238,7 @@ class LogTimingByEpochHook(LogByEpochHook):
                 last_elapsed_time = timer.get_elapsed_time()
                 if timer.has_history:
                     if timer_name == 'Train-step' and not self._is_train_step_history_trimmed:
-                        timer._history = timer._history[self._ignore_num_train_steps:]
+                        timer.drop_history(self._ignore_num_train_steps)
                         self._is_train_step_history_trimmed = True
                     history_mean = timer.get_history_mean()
                     history_sum = timer.get_history_sum()
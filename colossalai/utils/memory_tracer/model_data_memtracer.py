@@ -55,6 +55,19 @@ class ModelDataTracer(metaclass=SingletonMeta):
         else:
             raise TypeError
 
+    def adjust(self, delta: int, device: torch.device) -> None:
+        """Change the traced usage of `device` by `delta` bytes at once,
+        which saves a pair of `delete_tensor` and `add_tensor` calls per tensor when a batch of tensors is resized.
+        """
+        if not self._start_flag:
+            return
+        if device.type == 'cuda':
+            self._cuda_usage += delta
+        elif device.type == 'cpu':
+            self._cpu_usage += delta
+        else:
+            raise TypeError
+
     def clear(self) -> None:
         self._cuda_usage = 0
         self._cpu_usage = 0
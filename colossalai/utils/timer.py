@@ -2,18 +2,28 @@
 # -*- encoding: utf-8 -*-
 import time
 from typing import Tuple
+
+import torch
+
 from .cuda import synchronize
 
 
 class Timer:
     """A timer object which helps to log the execution times, and provides different tools to assess the times.
+    When CUDA is available, intervals are measured with CUDA events, so that the host does not have to
+    synchronize with the device until the times are queried.
     """
 
     def __init__(self):
         self._started = False
         self._start_time = time.time()
+        self._start_event = None
+        self._use_cuda_event = torch.cuda.is_available()
         self._elapsed = 0
         self._history = []
+        # sum of the first `_num_summed` intervals in history
+        self._history_sum = 0.0
+        self._num_summed = 0
 
     @property
     def has_history(self):
@@ -24,35 +34,69 @@ class Timer:
         synchronize()
         return time.time()
 
+    @staticmethod
+    def _resolve(interval) -> float:
+        # an interval measured by CUDA events is kept as (start_event, end_event) until it is queried
+        if isinstance(interval, tuple):
+            start_event, end_event = interval
+            end_event.synchronize()
+            return start_event.elapsed_time(end_event) / 1000.0
+        return interval
+
+    def _update_history_sum(self):
+        # only the intervals appended since the last query are resolved and added up
+        for i in range(self._num_summed, len(self._history)):
+            self._history[i] = self._resolve(self._history[i])
+            self._history_sum += self._history[i]
+        self._num_summed = len(self._history)
+
     def start(self):
-        """Fisrtly synchronize cuda, reset the clock and then start the timer.
+        """Reset the clock and then start the timer.
         """
         self._elapsed = 0
-        synchronize()
-        self._start_time = time.time()
+        if self._use_cuda_event:
+            self._start_event = torch.cuda.Event(enable_timing=True)
+            self._start_event.record()
+        else:
+            self._start_time = time.time()
         self._started = True
 
     def lap(self):
         """lap time and return elapsed time
         """
+        if self._use_cuda_event and self._start_event is not None:
+            lap_event = torch.cuda.Event(enable_timing=True)
+            lap_event.record()
+            return self._resolve((self._start_event, lap_event))
         return self.current_time - self._start_time
 
     def stop(self, keep_in_history: bool = False):
         """Stop the timer and record the start-stop time interval.
+        The interval can be queried by :meth:`get_elapsed_time`.
+
+        .. note:: When CUDA is available, the interval is measured by CUDA events and ``None`` is returned,
+            so that stopping the timer does not synchronize the device. If the timer was never started,
+            the time since its construction is measured and returned instead.
 
         :param keep_in_history: Whether does it record into history each start-stop interval, defaults to False
         :type keep_in_history: bool, optional
-        :return: Start-stop interval
-        :rtype: int
+        :return: Start-stop interval, or ``None`` when it is measured by CUDA events
+        :rtype: float
         """
-        synchronize()
-        end_time = time.time()
-        elapsed = end_time - self._start_time
+        # without a start event, e.g. when the timer was never started, the time since construction is measured
+        use_cuda_event = self._use_cuda_event and self._start_event is not None
+        if use_cuda_event:
+            end_event = torch.cuda.Event(enable_timing=True)
+            end_event.record()
+            elapsed = (self._start_event, end_event)
+        else:
+            elapsed = self.current_time - self._start_time
         if keep_in_history:
             self._history.append(elapsed)
         self._elapsed = elapsed
         self._started = False
-        return elapsed
+        if not use_cuda_event:
+            return elapsed
 
     def get_history_mean(self):
         """Mean of all history start-stop time intervals.
@@ -60,7 +104,8 @@ class Timer:
         :return: Mean of time intervals
         :rtype: int
         """
-        return sum(self._history) / len(self._history)
+        self._update_history_sum()
+        return self._history_sum / len(self._history)
 
     def get_history_sum(self):
         """Add up all the start-stop time intervals.
@@ -68,7 +113,8 @@ class Timer:
         :return: Sum of time intervals
         :rtype: int
         """
-        return sum(self._history)
+        self._update_history_sum()
+        return self._history_sum
 
     def get_elapsed_time(self):
         """Return the last start-stop time interval.
@@ -79,12 +125,25 @@ class Timer:
         :rtype: int
         """
         assert not self._started, 'Timer is still in progress'
+        self._elapsed = self._resolve(self._elapsed)
         return self._elapsed
 
+    def drop_history(self, num: int):
+        """Drop the earliest start-stop time intervals from history.
+
+        :param num: Number of intervals to drop
+        :type num: int
+        """
+        del self._history[:num]
+        self._history_sum = 0.0
+        self._num_summed = 0
+
     def reset(self):
         """Clear up the timer and its history
         """
-        self._history = []
+        self._history.clear()
+        self._history_sum = 0.0
+        self._num_summed = 0
         self._started = False
         self._elapsed = 0
 
@@ -118,11 +177,11 @@ class MultiTimer:
         :type name: str
         :param keep_in_history: Whether does it record into history each start-stop interval
         :type keep_in_history: bool
+        :return: Start-stop interval, or ``None`` when it is measured by CUDA events, see :meth:`Timer.stop`
+        :rtype: float
         """
         if self._on:
             return self._timers[name].stop(keep_in_history)
-        else:
-            return None
 
     def get_timer(self, name):
         """Get timer by its name (from multitimer)
@@ -143,7 +202,7 @@ class MultiTimer:
             if name is not None:
                 self._timers[name].reset()
             else:
-                for timer in self._timers:
+                for timer in self._timers.values():
                     timer.reset()
 
     def is_on(self):
@@ -1,4 +1,3 @@
-import functools
 from typing import Optional
 
 import torch
@@ -8,7 +7,6 @@ from colossalai.utils.memory_tracer.model_data_memtracer import \
     GLOBAL_MODEL_DATA_TRACER
 from colossalai.utils.memory_utils.memory_monitor import colo_cuda_memory_used
 from colossalai.zero.shard_utils import BaseShardStrategy
-from colossalai.zero.sharded_model._utils import cast_tensor_to_fp16
 from colossalai.zero.sharded_param import ShardedParamV2
 from torch.distributed import ProcessGroup
 from colossalai.logging import get_dist_logger, disable_existing_loggers
@@ -17,19 +15,20 @@ from colossalai.logging import get_dist_logger, disable_existing_loggers
 class InsertPostInitMethodToModuleSubClasses(object):
 
     def __init__(self):
-        pass
+        # subclasses of torch.nn.Module defined inside the context
+        self._subclasses_in_context = []
 
     def __enter__(self):
         r"""
         Enter the context scope.
         """
+        post_init_method = self._post_init_method
 
         def preprocess_after(f):
-
-            @functools.wraps(f)
+            # A plain closure is enough, the original __init__ is kept in cls._old_init
             def wrapper(module: torch.nn.Module, *args, **kwargs):
                 f(module, *args, **kwargs)
-                self._post_init_method(module)
+                post_init_method(module)
 
             return wrapper
 
@@ -39,7 +38,10 @@ class InsertPostInitMethodToModuleSubClasses(object):
 
         # The function is called during init subclass.
         def _init_subclass(cls, **kwargs):
+            # None means the class inherits __init__, then the wrapper is deleted on exit
+            cls._old_init = cls.__dict__.get('__init__')
             cls.__init__ = preprocess_after(cls.__init__)
+            self._subclasses_in_context.append(cls)
 
         # Replace .__init__() for all existing subclasses of torch.nn.Module
         # Excution self._post_init_method after the default init function.
@@ -58,9 +60,21 @@ class InsertPostInitMethodToModuleSubClasses(object):
         def _disable_class(cls):
             cls.__init__ = cls._old_init
 
+        def _disable_subclass_in_context(cls):
+            if cls._old_init is None:
+                del cls.__init__
+            else:
+                cls.__init__ = cls._old_init
+
         # Replace .__init__() for all existing subclasses of torch.nn.Module
         for subclass in torch.nn.modules.module.Module.__subclasses__():
-            _disable_class(subclass)
+            if subclass not in self._subclasses_in_context:
+                _disable_class(subclass)
+
+        # Replace .__init__() for subclasses of torch.nn.Module defined inside the context
+        for subclass in self._subclasses_in_context:
+            _disable_subclass_in_context(subclass)
+        self._subclasses_in_context.clear()
 
         # Replace .__init__() for future subclasses of torch.nn.Module
         torch.nn.modules.module.Module.__init_subclass__ = (torch.nn.modules.module.Module._old_init_subclass)
@@ -122,7 +136,11 @@ class ZeroInitContext(InsertPostInitMethodToModuleSubClasses):
         self.shard_strategy = shard_strategy
         self.rm_torch_payload_on_the_fly = rm_torch_payload_on_the_fly
         self.initialized_param_list = []
+        # ids of params adapted in the context, which are kept alive by initialized_param_list
+        self._seen_param_ids = set()
         self.model_numel_tensor = model_numel_tensor
+        # number of elements of params initialized in the context, added to model_numel_tensor on exit
+        self._param_numel = 0
         self.dp_process_group = dp_process_group or gpc.get_group(ParallelMode.DATA)
 
     def _pre_context_exec(self):
@@ -141,7 +159,9 @@ class ZeroInitContext(InsertPostInitMethodToModuleSubClasses):
                 param.col_attr.remove_torch_payload()
 
             del self.initialized_param_list
+        self._seen_param_ids.clear()
         GLOBAL_MODEL_DATA_TRACER.close()
+        self.model_numel_tensor += self._param_numel
         model_data_cuda_mem_MB = GLOBAL_MODEL_DATA_TRACER.cuda_usage / 1e6
         self.logger.info(f"Existing ZeRO Context.\nModel Data CUDA Memory {model_data_cuda_mem_MB} MB", ranks=[0])
         sys_cuda_mem_MB = colo_cuda_memory_used() / 1e6
@@ -153,25 +173,26 @@ class ZeroInitContext(InsertPostInitMethodToModuleSubClasses):
         The function to call at the end of the constructor of each module.
         NOTE() The module may be passed to this function multiple times.
         """
-        for param in module.parameters():
-            # avoid adapting a param to ShardedParam twice
-            if hasattr(param, 'col_attr'):
-                continue
-
-            self.model_numel_tensor += param.numel()
-
-            target_device = self.target_device
-
-            # convert to fp16 if necessary
-            if self.convert_fp16:
-                param.data = param.data.to(torch.half)
-                if param.grad is not None:
-                    param.grad = param.grad.to(torch.half)
-
-            # move torch parameters to the target device
-            param.data = param.data.to(target_device)
+        target_device = torch.device(self.target_device)
+        # copies to cpu must finish before the data is used, so only copies to cuda are asynchronous
+        non_blocking = target_device.type == 'cuda'
+
+        # avoid adapting a param to ShardedParam twice
+        # params of submodules were already seen when the submodules were initialized, skip them by id first
+        params = [
+            param for param in module.parameters()
+            if id(param) not in self._seen_param_ids and not hasattr(param, 'col_attr')
+        ]
+        self._seen_param_ids.update(id(param) for param in params)
+
+        for param in params:
+            self._param_numel += param.numel()
+
+            # convert to fp16 if necessary and move torch parameters to the target device in a single copy
+            param_dtype = torch.half if self.convert_fp16 else param.data.dtype
+            param.data = param.data.to(device=target_device, dtype=param_dtype, non_blocking=non_blocking)
             if param.grad is not None:
-                param.grad = param.grad.to(target_device)
+                param.grad = param.grad.to(device=target_device, dtype=param_dtype, non_blocking=non_blocking)
 
             param.col_attr = ShardedParamV2(param, rm_torch_payload=self.rm_torch_payload_on_the_fly)
 
@@ -179,13 +200,15 @@ class ZeroInitContext(InsertPostInitMethodToModuleSubClasses):
 
             GLOBAL_MODEL_DATA_TRACER.add_tensor(param.col_attr.sharded_data_tensor)
 
-            if self.shard_param:
-                self.shard_strategy.shard([param.col_attr.sharded_data_tensor], self.dp_process_group)
+        # shard the params of the module in one call, so that strategies can handle them as a bucket
+        if self.shard_param and len(params) > 0:
+            self.shard_strategy.shard([param.col_attr.sharded_data_tensor for param in params], self.dp_process_group)
 
         # We must cast buffers
         # If we use BN, buffers may be on CPU and Float
         # We must cast them
+        buffer_device = torch.device('cuda', torch.cuda.current_device())
         for buffer in module.buffers():
-            buffer.data = buffer.data.to(device=torch.cuda.current_device())
-            if self.convert_fp16:
-                buffer.data = cast_tensor_to_fp16(buffer.data)
+            # only fp32 buffers are cast, as cast_tensor_to_fp16 does
+            buffer_dtype = torch.half if self.convert_fp16 and buffer.data.dtype is torch.float32 else buffer.data.dtype
+            buffer.data = buffer.data.to(device=buffer_device, dtype=buffer_dtype, non_blocking=True)
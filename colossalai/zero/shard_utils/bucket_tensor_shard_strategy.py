@@ -3,13 +3,34 @@ from typing import List, Optional
 import torch
 import torch.distributed as dist
 from colossalai.utils import get_current_device
-from colossalai.zero.sharded_param.sharded_tensor import ShardedTensor
-from torch._utils import _flatten_dense_tensors as flatten
+from colossalai.zero.sharded_param.sharded_tensor import ShardedTensor, get_world_size_and_rank
 
 from .tensor_shard_strategy import TensorShardStrategy
 from colossalai.utils.memory_tracer.model_data_memtracer import GLOBAL_MODEL_DATA_TRACER
 
 
+def _all_gather_into_tensor(output: torch.Tensor, input_: torch.Tensor, process_group: Optional[dist.ProcessGroup]):
+    """All-gather `input_` of every rank into the rows of `output`, whose shape is (world_size, input_.numel()).
+    """
+    if hasattr(dist, 'all_gather_into_tensor'):
+        dist.all_gather_into_tensor(output.view(-1), input_, group=process_group)
+    elif hasattr(dist, '_all_gather_base'):
+        dist._all_gather_base(output.view(-1), input_, group=process_group)
+    else:
+        # fallback, the rows of output are views, so no extra copy is needed
+        dist.all_gather(list(output.unbind(0)), input_, group=process_group)
+
+
+def _move_to_host(buffer: torch.Tensor) -> torch.Tensor:
+    """Copy a cuda buffer into pinned host memory, which is faster than a copy into pageable memory.
+    The host reads the result right away, so it waits for the copy before returning.
+    """
+    host_buffer = torch.empty(buffer.shape, dtype=buffer.dtype, pin_memory=True)
+    host_buffer.copy_(buffer, non_blocking=True)
+    torch.cuda.current_stream().synchronize()
+    return host_buffer
+
+
 class BucketTensorShardStrategy(TensorShardStrategy):
     """Use the same shard scheme as `TensorShardStrategy`'s, but it gathers tensors of a sub-module together, 
     which will fully utilize network bandwidth. 
@@ -18,38 +39,51 @@ class BucketTensorShardStrategy(TensorShardStrategy):
     """
 
     def gather(self, tensor_list: List[ShardedTensor], process_group: Optional[dist.ProcessGroup] = None):
-        for t in tensor_list:
-            GLOBAL_MODEL_DATA_TRACER.delete_tensor(t)
-
         tensor_list: List[ShardedTensor] = [t for t in tensor_list if t.is_sharded]
         if len(tensor_list) == 0:
             return
+        # Lay out large payloads first and pack small ones (e.g. bias) into the tail of the bucket.
+        # Only the local order changes, callers keep their ShardedTensor objects.
+        # Payload sizes are identical on all ranks and the sort is stable, so every rank agrees on the layout.
+        tensor_list = sorted(tensor_list, key=lambda t: t.payload.numel(), reverse=True)
         target_device = tensor_list[0].device
         dtype = tensor_list[0].dtype
-        buffer_list: List[torch.Tensor] = []
-        tensor_numels = [t.payload.numel() for t in tensor_list]
+        payloads = [t.payload for t in tensor_list]
+        tensor_numels = [payload.numel() for payload in payloads]
         buffer_size = sum(tensor_numels)
-        world_size = dist.get_world_size(process_group)
-        rank = dist.get_rank(process_group)
-        for i in range(world_size):
-            if i == rank:
-                buffer_list.append(flatten([t.payload for t in tensor_list]).cuda(get_current_device()))
-                # Release payload here, to decrease peak memory usage
-                for t in tensor_list:
-                    t.reset_payload(None)
-            else:
-                buffer_list.append(torch.zeros(buffer_size, dtype=dtype, device=get_current_device()))
-        dist.all_gather(buffer_list, buffer_list[rank], group=process_group)
+        # everything the split loop needs, read once per tensor
+        meta = [(t, numel, t.origin_numel, t.origin_shape) for t, numel in zip(tensor_list, tensor_numels)]
+        world_size, rank = get_world_size_and_rank(process_group)
+        # The gathered buffers of all ranks are rows of a single tensor,
+        # and local payloads are written into the local row directly
+        buffer = torch.empty(world_size, buffer_size, dtype=dtype, device=get_current_device())
+        local_buffer = buffer[rank]
+        if target_device.type == 'cuda':
+            torch.cat([payload.view(-1) for payload in payloads], out=local_buffer)
+        else:
+            # flatten cpu payloads on the host first, so that they are moved to cuda by a single copy
+            staging_buffer = torch.empty(buffer_size, dtype=dtype, pin_memory=torch.cuda.is_available())
+            torch.cat([payload.view(-1) for payload in payloads], out=staging_buffer)
+            local_buffer.copy_(staging_buffer, non_blocking=True)
+        # Release payload here, to decrease peak memory usage
+        del payloads
+        for t in tensor_list:
+            t.reset_payload(None)
+        _all_gather_into_tensor(buffer, local_buffer, process_group)
         # Move to target device before splitting buffer
         # Ensure we utilize maximum PCIE bandwidth
-        buffer_list = [buffer.to(target_device) for buffer in buffer_list]
+        if target_device.type == 'cpu' and buffer.device.type == 'cuda':
+            buffer = _move_to_host(buffer)
+        else:
+            buffer = buffer.to(target_device)
         offset = 0
-        for i, t in enumerate(tensor_list):
-            gathered_payload = [buffer[offset:offset + tensor_numels[i]] for buffer in buffer_list]
-            gathered_payload = torch.cat(gathered_payload)[:t.origin_numel].view(t.origin_shape)
+        gathered_numel = 0
+        for t, numel, origin_numel, origin_shape in meta:
+            gathered_payload = buffer[:, offset:offset + numel].reshape(-1)
+            gathered_payload = gathered_payload[:origin_numel].view(origin_shape)
             t.reset_payload(gathered_payload)
             t.is_sharded = False
-            offset += tensor_numels[i]
-
-        for t in tensor_list:
-            GLOBAL_MODEL_DATA_TRACER.add_tensor(t)
+            offset += numel
+            gathered_numel += origin_numel
+        # The payloads grow from shards to full tensors on target_device, trace the difference in one call
+        GLOBAL_MODEL_DATA_TRACER.adjust((gathered_numel - buffer_size) * buffer.element_size(), target_device)
@@ -1,20 +1,22 @@
 import torch
-import torch.nn.functional as F
 from typing import Tuple
 
 
 def get_shard(tensor: torch.Tensor, rank: int, world_size: int) -> Tuple[torch.Tensor, int]:
     """Return the local shard of a full tensor."""
-    # Shard using torch.chunk to match all-gather/reduce-scatter.
-    chunks = list(torch.flatten(tensor).chunk(world_size))
-    while len(chunks) < world_size:
-        chunks.append(chunks[0].new_empty(0))
+    # Shard the same way as torch.chunk to match all-gather/reduce-scatter.
+    flat_tensor = tensor.reshape(-1)
+    numel = flat_tensor.numel()
+    shard_size = (numel + world_size - 1) // world_size
+    start = min(rank * shard_size, numel)
+    end = min(start + shard_size, numel)
 
     # Determine number of padding elements.
-    num_to_pad = chunks[0].numel() - chunks[rank].numel()
-    assert num_to_pad >= 0, num_to_pad
+    num_to_pad = shard_size - (end - start)
 
-    shard = chunks[rank].clone()
+    # Copy the chunk into a pre-padded buffer, so that no extra padding copy is needed
+    shard = torch.empty(shard_size, dtype=flat_tensor.dtype, device=flat_tensor.device)
+    shard[:end - start].copy_(flat_tensor[start:end])
     if num_to_pad > 0:
-        shard = F.pad(shard, [0, num_to_pad])
+        shard[end - start:].zero_()
     return shard, num_to_pad
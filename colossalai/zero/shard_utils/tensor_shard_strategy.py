@@ -6,7 +6,7 @@ from colossalai.utils import get_current_device
 from colossalai.utils.memory_utils.utils import colo_model_data_tensor_move, colo_model_data_tensor_move_inline
 from colossalai.zero.shard_utils import BaseShardStrategy
 from colossalai.zero.shard_utils.commons import get_shard
-from colossalai.zero.sharded_param.sharded_tensor import ShardedTensor
+from colossalai.zero.sharded_param.sharded_tensor import ShardedTensor, get_world_size_and_rank
 from colossalai.utils.memory_tracer.model_data_memtracer import GLOBAL_MODEL_DATA_TRACER
 
 
@@ -37,7 +37,8 @@ class TensorShardStrategy(BaseShardStrategy):
             assert t.payload.device.index == get_current_device(), f"shard tensor on cuda device index {t.payload.device.index},"\
                 f" but current cuda device is {get_current_device()}"
         GLOBAL_MODEL_DATA_TRACER.delete_tensor(t.payload)
-        sharded_payload, _ = get_shard(t.payload, dist.get_rank(process_group), dist.get_world_size(process_group))
+        world_size, rank = get_world_size_and_rank(process_group)
+        sharded_payload, _ = get_shard(t.payload, rank, world_size)
         t.reset_payload(sharded_payload)
         GLOBAL_MODEL_DATA_TRACER.add_tensor(t.payload)
         t.is_sharded = True
@@ -48,13 +49,12 @@ class TensorShardStrategy(BaseShardStrategy):
         target_device = t.device
         buffer_list = []
         payload_numel = t.payload.numel()
-        world_size = dist.get_world_size(process_group)
-        rank = dist.get_rank(process_group)
+        world_size, rank = get_world_size_and_rank(process_group)
         for i in range(world_size):
             if i == rank:
                 buffer_list.append(t.payload.cuda(get_current_device()))
             else:
-                buffer_list.append(torch.zeros(payload_numel, dtype=t.dtype, device=get_current_device()))
+                buffer_list.append(torch.empty(payload_numel, dtype=t.dtype, device=get_current_device()))
 
         GLOBAL_MODEL_DATA_TRACER.delete_tensor(t.payload)
         dist.all_gather(buffer_list, buffer_list[rank], group=process_group, async_op=False)
@@ -1,19 +1,23 @@
 import torch
 from colossalai.zero.sharded_model import ShardedModelV2
 
-import copy
-
 
 def col_model_deepcopy(sharded_model: ShardedModelV2, other_model: torch.nn.Module):
     """
     copy param of the ShardedModelV2 to other_model.
     Note the other_model has to be the same as self.
     """
-    for zero_param, param in zip(sharded_model.parameters(), other_model.parameters()):
+    param_pairs = list(zip(sharded_model.parameters(), other_model.parameters()))
+    for zero_param, _ in param_pairs:
         assert hasattr(zero_param, 'col_attr')
-        shard_flag = zero_param.col_attr.sharded_data_tensor.is_sharded
-        if shard_flag:
-            sharded_model.shard_strategy.gather([zero_param.col_attr.sharded_data_tensor])
-        param.data = copy.deepcopy(zero_param.col_attr.sharded_data_tensor.payload)
-        if shard_flag:
-            sharded_model.shard_strategy.shard([zero_param.col_attr.sharded_data_tensor])
+    # gather and re-shard all the sharded params at once, rather than issuing collectives param by param
+    sharded_tensors = [
+        zero_param.col_attr.sharded_data_tensor
+        for zero_param, _ in param_pairs
+        if zero_param.col_attr.sharded_data_tensor.is_sharded
+    ]
+    sharded_model.shard_strategy.gather(sharded_tensors)
+    for zero_param, param in param_pairs:
+        src = zero_param.col_attr.sharded_data_tensor.payload
+        param.data = torch.empty_like(src).copy_(src)
+    sharded_model.shard_strategy.shard(sharded_tensors)
@@ -1,9 +1,36 @@
 import torch
 import torch.distributed as dist
-from typing import Optional
+from colossalai.core import global_context as gpc
+from typing import Dict, Optional, Tuple
+
+# (world_size, rank) of process groups, which are constant once the groups are created.
+# The groups are used as keys, so they are kept alive and their ids can not be reused.
+# The cache is cleared when the parallel context is destroyed.
+_PG_CACHE: Dict[Optional[dist.ProcessGroup], Tuple[int, int]] = dict()
+
+
+def get_world_size_and_rank(process_group: Optional[dist.ProcessGroup] = None) -> Tuple[int, int]:
+    """Return the world size and the rank of the process group, which are only queried once per group.
+    """
+    if process_group not in _PG_CACHE:
+        _PG_CACHE[process_group] = (dist.get_world_size(process_group), dist.get_rank(process_group))
+    return _PG_CACHE[process_group]
+
+
+def clear_process_group_cache() -> None:
+    """Clear the cached world sizes and ranks, and release the process groups kept by the cache.
+    It is called when the parallel context is destroyed.
+    """
+    _PG_CACHE.clear()
+
+
+gpc.register_destroy_hook(clear_process_group_cache)
 
 
 class ShardedTensor(object):
+    # a model holds one instance per parameter, so drop the per-instance __dict__
+    __slots__ = ('_payload', 'process_group', 'world_size', 'local_rank', '_is_sharded', '_origin_shape',
+                 '_origin_numel', '_origin_dtype')
 
     def __init__(self, tensor: torch.Tensor, process_group: Optional[dist.ProcessGroup] = None) -> None:
         r"""
@@ -11,8 +38,7 @@ class ShardedTensor(object):
         """
         self._payload = tensor
         self.process_group = process_group
-        self.world_size = dist.get_world_size(self.process_group)
-        self.local_rank = dist.get_rank(self.process_group)
+        self.world_size, self.local_rank = get_world_size_and_rank(self.process_group)
         self._is_sharded = False
 
         self._origin_shape = tensor.shape
@@ -40,7 +66,10 @@ class ShardedTensor(object):
         return self._payload
 
     def copy_payload(self, tensor):
-        self._payload.view(-1).copy_(tensor.view(-1))
+        # copy_ converts dtype and device itself, only the shape has to be matched
+        if tensor.shape != self._payload.shape:
+            tensor = tensor.reshape(self._payload.shape)
+        self._payload.copy_(tensor)
 
     def reset_payload(self, tensor):
         del self._payload
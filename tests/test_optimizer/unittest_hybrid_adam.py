@@ -39,3 +39,32 @@ def test_adam(adamw, device, p_dtype, g_dtype):
             continue
         assert torch.allclose(p.data, p_copy.data, 1e-4, 1e-2), \
                               f"adaw mode {adamw}, device {device}, p_dtype {p_dtype}, g_dtype {g_dtype}"
+
+
+@parameterize('adamw', [False, True])
+@parameterize('device', ['cpu', 'cuda:0'])
+def test_adam_mismatched_steps(adamw, device):
+    # params of the same group fall behind each other in steps when their grads are None on some steps
+    shapes = [(64,), (32, 8), (7,), (3, 5)]
+    params = [nn.Parameter(torch.rand(shape, device=device)) for shape in shapes]
+    params_copy = [nn.Parameter(p.data.clone()) for p in params]
+    groups = [{'params': params[:2]}, {'params': params[2:], 'lr': 2e-3}]
+    groups_copy = [{'params': params_copy[:2]}, {'params': params_copy[2:], 'lr': 2e-3}]
+
+    optim = HybridAdam(groups, lr=1e-3, adamw_mode=adamw)
+    torch_optim = AdamW(groups_copy, lr=1e-3) if adamw else Adam(groups_copy, lr=1e-3)
+
+    for i in range(16):
+        for j, (p, p_copy) in enumerate(zip(params, params_copy)):
+            if i % (j + 1) == 0:
+                p.grad = torch.rand(p.shape, device=device)
+                p_copy.grad = p.grad.clone()
+            else:
+                p.grad = None
+                p_copy.grad = None
+
+        optim.step()
+        torch_optim.step()
+
+        for p, p_copy in zip(params, params_copy):
+            assert torch.allclose(p.data, p_copy.data, 1e-4, 1e-2), f"adaw mode {adamw}, device {device}"
@@ -0,0 +1,86 @@
+import math
+import time
+
+import pytest
+import torch
+from colossalai.utils import MultiTimer, Timer
+
+
+@pytest.mark.parametrize('use_cuda_event', [False, True])
+def test_timer_stop(use_cuda_event):
+    if use_cuda_event and not torch.cuda.is_available():
+        pytest.skip('CUDA is not available')
+    timer = Timer()
+    timer._use_cuda_event = use_cuda_event
+    # lap works before the timer is started
+    assert timer.lap() >= 0
+
+    # stop works before the timer is started, and measures the time since construction
+    unstarted_timer = Timer()
+    unstarted_timer._use_cuda_event = use_cuda_event
+    elapsed = unstarted_timer.stop(keep_in_history=True)
+    assert elapsed is not None and elapsed >= 0
+    assert unstarted_timer.get_elapsed_time() == elapsed
+    assert unstarted_timer.get_history_sum() == elapsed
+
+    timer.start()
+    time.sleep(0.01)
+    assert timer.lap() > 0
+    elapsed = timer.stop(keep_in_history=True)
+    if use_cuda_event:
+        assert elapsed is None
+    else:
+        assert elapsed == timer.get_elapsed_time()
+    assert timer.get_elapsed_time() == timer.get_history_sum()
+
+
+@pytest.mark.parametrize('use_cuda_event', [False, True])
+def test_timer_history(use_cuda_event):
+    if use_cuda_event and not torch.cuda.is_available():
+        pytest.skip('CUDA is not available')
+    timer = Timer()
+    timer._use_cuda_event = use_cuda_event
+    intervals = []
+
+    def _record():
+        timer.start()
+        time.sleep(0.001)
+        timer.stop(keep_in_history=True)
+        intervals.append(timer.get_elapsed_time())
+
+    for _ in range(4):
+        _record()
+    assert math.isclose(timer.get_history_sum(), sum(intervals))
+    assert math.isclose(timer.get_history_mean(), sum(intervals) / 4)
+
+    # the running sum is rebuilt from the remaining intervals
+    timer.drop_history(2)
+    del intervals[:2]
+    assert math.isclose(timer.get_history_sum(), sum(intervals))
+    _record()
+    assert math.isclose(timer.get_history_sum(), sum(intervals))
+    assert math.isclose(timer.get_history_mean(), sum(intervals) / 3)
+
+    timer.reset()
+    intervals.clear()
+    assert not timer.has_history
+    assert timer.get_history_sum() == 0
+    _record()
+    assert math.isclose(timer.get_history_mean(), intervals[0])
+
+
+def test_multi_timer_reset():
+    timer = MultiTimer()
+    for name in ['forward', 'backward']:
+        timer.start(name)
+        timer.stop(name, keep_in_history=True)
+    # reset all the timers when no name is given
+    timer.reset()
+    for _, t in timer:
+        assert not t.has_history
+
+
+if __name__ == '__main__':
+    test_timer_stop(False)
+    test_timer_history(False)
+    test_multi_timer_reset()
@@ -13,6 +13,7 @@ from colossalai.utils.cuda import get_current_device
 from colossalai.utils.memory_tracer.model_data_memtracer import \
     GLOBAL_MODEL_DATA_TRACER
 from colossalai.zero.init_ctx import ZeroInitContext
+from colossalai.zero.init_ctx.init_context import InsertPostInitMethodToModuleSubClasses
 from colossalai.zero.shard_utils import (BucketTensorShardStrategy, TensorShardStrategy)
 from colossalai.testing import rerun_on_exception
 from tests.components_to_test.registry import non_distributed_component_funcs
@@ -66,5 +67,39 @@ def test_zero_init_context(world_size):
     mp.spawn(run_func, nprocs=world_size)
 
 
+def test_init_restored_on_exit():
+    post_init_modules = []
+
+    class PostInitContext(InsertPostInitMethodToModuleSubClasses):
+
+        def _post_init_method(self, module):
+            post_init_modules.append(module)
+
+    linear_init = torch.nn.Linear.__init__
+    with PostInitContext():
+
+        # defined inside the context, with and without its own __init__
+        class LinearNoInit(torch.nn.Linear):
+            pass
+
+        class ModuleWithInit(torch.nn.Module):
+
+            def __init__(self):
+                super().__init__()
+                self.linear = LinearNoInit(2, 2)
+
+        model = ModuleWithInit()
+    assert model in post_init_modules
+    assert model.linear in post_init_modules
+
+    assert torch.nn.Linear.__init__ is linear_init
+    assert '__init__' not in LinearNoInit.__dict__
+    assert ModuleWithInit.__init__.__qualname__.endswith('ModuleWithInit.__init__')
+    post_init_modules.clear()
+    ModuleWithInit()
+    assert len(post_init_modules) == 0
+
+
 if __name__ == '__main__':
     test_zero_init_context(4)
+    test_init_restored_on_exit()
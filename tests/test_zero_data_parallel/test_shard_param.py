@@ -6,14 +6,32 @@ import pytest
 import torch
 import torch.multiprocessing as mp
 from colossalai.testing import parameterize
-from colossalai.utils import free_port
+from colossalai.utils import free_port, get_current_device
 from colossalai.zero.shard_utils import (BucketTensorShardStrategy, TensorShardStrategy)
+from colossalai.zero.shard_utils.commons import get_shard
 from colossalai.zero.sharded_param import ShardedTensor
 from colossalai.zero.sharded_param.sharded_param import ShardedParamV2
 from colossalai.testing import rerun_on_exception
 from tests.test_zero_data_parallel.common import CONFIG, allclose
 
 
+@pytest.mark.parametrize("numel", [0, 3, 5, 8, 10])
+@pytest.mark.parametrize("world_size", [1, 2, 4])
+def test_get_shard(numel, world_size):
+    tensor = torch.randn(numel)
+    # shards are the chunks of torch.chunk padded to the size of the first chunk, missing chunks are all padding
+    chunks = list(tensor.chunk(world_size))
+    shard_size = chunks[0].numel()
+    for rank in range(world_size):
+        chunk = chunks[rank] if rank < len(chunks) else tensor.new_empty(0)
+        num_to_pad = shard_size - chunk.numel()
+        ref_shard = torch.cat([chunk, chunk.new_zeros(num_to_pad)])
+
+        shard, pad = get_shard(tensor.view(-1, 1), rank, world_size)
+        assert pad == num_to_pad, f"{pad} vs {num_to_pad}"
+        assert torch.equal(shard, ref_shard), f"{shard} vs {ref_shard}"
+
+
 @parameterize("shard_strategy_class", [TensorShardStrategy, BucketTensorShardStrategy])
 def run_shard_tensor_with_strategy(shard_strategy_class, world_size):
     t = ShardedTensor(tensor=torch.randn(world_size * 2, 3))
@@ -29,9 +47,28 @@ def run_shard_tensor_with_strategy(shard_strategy_class, world_size):
     assert list(t.shape) == [world_size * 2, 3], f"{list(t.shape)} vs {[world_size * 2, 3]}"
 
 
+@parameterize("device", ['cpu', 'cuda'])
+def run_bucket_gather_mixed_sizes(device):
+    # sizes are not divisible by the world size, and the bucket mixes large and small tensors
+    shapes = [(3,), (17, 5), (1,), (64, 32), (7, 3)]
+    device = torch.device(device, get_current_device()) if device == 'cuda' else torch.device(device)
+    tensors = [torch.randn(shape, device=device) for shape in shapes]
+    sharded_tensors = [ShardedTensor(tensor=t.clone()) for t in tensors]
+
+    shard_strategy = BucketTensorShardStrategy()
+    shard_strategy.shard(sharded_tensors)
+    assert all(t.is_sharded for t in sharded_tensors)
+    shard_strategy.gather(sharded_tensors)
+    for t, ref in zip(sharded_tensors, tensors):
+        assert not t.is_sharded
+        assert t.device.type == device.type
+        assert torch.equal(t.payload, ref), f"{t.payload} vs {ref}"
+
+
 def _run_shard_tensor(rank, world_size, port):
     colossalai.launch(config=CONFIG, rank=rank, world_size=world_size, host='localhost', port=port, backend='nccl')
     run_shard_tensor_with_strategy(world_size=world_size)
+    run_bucket_gather_mixed_sizes()
 
 
 @pytest.mark.dist
@@ -64,5 +101,6 @@ def test_shard_param_v2(world_size):
 
 
 if __name__ == '__main__':
+    test_get_shard(10, 4)
     test_shard_tensor(2)
     test_shard_param_v2(2)